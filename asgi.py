@@ -0,0 +1,23 @@
+"""ASGI entry point for the web player.
+
+The Werkzeug dev server pins one OS thread per in-flight stream, which caps
+concurrent viewers at its thread pool. Serving the app through an asyncio
+server lets one event loop juggle thousands of slow readers:
+
+    uvicorn --loop uvloop --workers 4 asgi:application
+
+The WSGI routes are bridged with asgiref's adapter, so this needs
+``pip install uvicorn uvloop asgiref``. Streaming responses still run the
+sendfile/mmap fast paths from web.py.
+"""
+
+try:
+    from asgiref.wsgi import WsgiToAsgi
+except ImportError as e:
+    raise ImportError(
+        "The ASGI entry point needs asgiref: pip install asgiref"
+    ) from e
+
+from web import app
+
+application = WsgiToAsgi(app)
@@ -0,0 +1,100 @@
+"""Fast file metadata lookups for the video player.
+
+On Linux this calls statx(2) directly with AT_STATX_DONT_SYNC and a mask of
+only the fields the player actually reads (size, mtime, type). The kernel can
+then answer from the dentry cache without the sync round-trip os.stat forces
+on remote filesystems, and copies fewer fields to userspace. Everywhere else,
+or if the syscall is unavailable, fast_stat falls back to os.stat.
+"""
+
+import ctypes
+import errno
+import os
+import sys
+from collections import namedtuple
+
+FastStat = namedtuple('FastStat', ['st_size', 'st_mtime'])
+
+AT_FDCWD = -100
+AT_STATX_DONT_SYNC = 0x4000
+STATX_TYPE = 0x0001
+STATX_MTIME = 0x0040
+STATX_SIZE = 0x0200
+
+_STATX_NR = {
+    'x86_64': 332,
+    'aarch64': 291,
+    'armv7l': 397,
+    'i686': 383,
+}
+
+class _StatxTimestamp(ctypes.Structure):
+    _fields_ = [
+        ('tv_sec', ctypes.c_int64),
+        ('tv_nsec', ctypes.c_uint32),
+        ('_reserved', ctypes.c_int32),
+    ]
+
+class _Statx(ctypes.Structure):
+    _fields_ = [
+        ('stx_mask', ctypes.c_uint32),
+        ('stx_blksize', ctypes.c_uint32),
+        ('stx_attributes', ctypes.c_uint64),
+        ('stx_nlink', ctypes.c_uint32),
+        ('stx_uid', ctypes.c_uint32),
+        ('stx_gid', ctypes.c_uint32),
+        ('stx_mode', ctypes.c_uint16),
+        ('_spare0', ctypes.c_uint16),
+        ('stx_ino', ctypes.c_uint64),
+        ('stx_size', ctypes.c_uint64),
+        ('stx_blocks', ctypes.c_uint64),
+        ('stx_attributes_mask', ctypes.c_uint64),
+        ('stx_atime', _StatxTimestamp),
+        ('stx_btime', _StatxTimestamp),
+        ('stx_ctime', _StatxTimestamp),
+        ('stx_mtime', _StatxTimestamp),
+        ('stx_rdev_major', ctypes.c_uint32),
+        ('stx_rdev_minor', ctypes.c_uint32),
+        ('stx_dev_major', ctypes.c_uint32),
+        ('stx_dev_minor', ctypes.c_uint32),
+        ('stx_mnt_id', ctypes.c_uint64),
+        ('_spare2', ctypes.c_uint64),
+        ('_spare3', ctypes.c_uint64 * 12),
+    ]
+
+_syscall = None
+_statx_nr = None
+if sys.platform == 'linux':
+    _statx_nr = _STATX_NR.get(os.uname().machine)
+    if _statx_nr is not None:
+        try:
+            _libc = ctypes.CDLL(None, use_errno=True)
+            _libc.syscall.restype = ctypes.c_long
+            _syscall = _libc.syscall
+        except (OSError, AttributeError):
+            _statx_nr = None
+
+def fast_stat(path) -> FastStat:
+    """Return size and mtime for path, via statx on Linux"""
+    global _statx_nr
+    if _statx_nr is not None:
+        buf = _Statx()
+        res = _syscall(
+            ctypes.c_long(_statx_nr),
+            ctypes.c_int(AT_FDCWD),
+            os.fsencode(path),
+            ctypes.c_int(AT_STATX_DONT_SYNC),
+            ctypes.c_uint(STATX_SIZE | STATX_MTIME | STATX_TYPE),
+            ctypes.byref(buf),
+        )
+        if res == 0:
+            return FastStat(buf.stx_size, buf.stx_mtime.tv_sec + buf.stx_mtime.tv_nsec / 1e9)
+        err = ctypes.get_errno()
+        if err == errno.ENOSYS:
+            # Old kernel; stop trying for the rest of the process
+            _statx_nr = None
+        elif err in (errno.ENOENT, errno.ENOTDIR):
+            raise FileNotFoundError(err, os.strerror(err), str(path))
+        # Anything else (permissions, odd filesystems): let os.stat decide
+    st = os.stat(path)
+    return FastStat(st.st_size, st.st_mtime)
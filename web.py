@@ -1,22 +1,56 @@
-from flask import Flask, request, Response, render_template_string, redirect, url_for, jsonify
+from flask import Flask, request, Response, redirect, url_for, jsonify
+import atexit
+import copy
 import os
-import mimetypes
+import functools
 import logging
+import logging.handlers
+import gzip
+import hashlib
+import mmap
+import random
+import re
+import socket
+import time
 from pathlib import Path
 from typing import Union, BinaryIO
 from datetime import datetime, timedelta
+from email.utils import formatdate
 import json
 import ffmpeg
+import queue
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import html
-from collections import defaultdict
-from urllib.parse import unquote
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s'
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+from platform_stat import fast_stat
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json works everywhere
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+# Configure logging. Records go through a queue to a background listener
+# thread, so request threads pay one enqueue instead of formatting and
+# writing under the handler lock.
+_log_queue = queue.SimpleQueue()
+_stream_handler = logging.StreamHandler()
+_stream_handler.setFormatter(
+    logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+)
+_root_logger = logging.getLogger()
+_root_logger.setLevel(logging.INFO)
+_root_logger.handlers = [logging.handlers.QueueHandler(_log_queue)]
+_log_listener = logging.handlers.QueueListener(
+    _log_queue, _stream_handler, respect_handler_level=True
 )
+_log_listener.start()
 logger = logging.getLogger(__name__)
 
 class Config:
@@ -26,12 +60,46 @@ class Config:
     MAX_CACHE_AGE = 86400  # 24 hours
     ALLOWED_EXTENSIONS = {'.mp4', '.mkv', '.avi', '.mov', '.webm'}
     ITEMS_PER_PAGE = 32
+    READAHEAD_DEPTH = 8  # chunks the background reader keeps in flight ahead of the socket
     ENABLE_COMMENTS = True
     ENABLE_PLAYLISTS = True
     DURATION_CACHE_FILE = 'duration_cache.json'
+    # When fronted by nginx, answer /video/* with X-Accel-Redirect so nginx
+    # sendfile()s the bytes (including Range handling) and Python only does
+    # validation. Requires a location like:
+    #   location /_internal/ { internal; alias /path/to/videos/; }
+    USE_X_ACCEL = False
+    X_ACCEL_PREFIX = '/_internal'
 
 app = Flask(__name__)
 
+if orjson is not None:
+    try:
+        from flask.json.provider import JSONProvider
+    except ImportError:  # Flask < 2.2 keeps its default encoder
+        JSONProvider = None
+
+    if JSONProvider is not None:
+        class OrjsonProvider(JSONProvider):
+            """Route jsonify and request.json through orjson"""
+            def dumps(self, obj, **kwargs):
+                return orjson.dumps(obj).decode('utf-8')
+
+            def loads(self, s, **kwargs):
+                return orjson.loads(s)
+
+        app.json = OrjsonProvider(app)
+
+# Constant lookup covering ALLOWED_EXTENSIONS, avoids mimetypes.guess_type
+# (lazy global init + generic table walk) on every listing and stream
+_EXT_MIME = {
+    '.mp4': 'video/mp4',
+    '.mkv': 'video/x-matroska',
+    '.avi': 'video/x-msvideo',
+    '.mov': 'video/quicktime',
+    '.webm': 'video/webm',
+}
+
 # Initialize data storage
 COMMENTS_FILE = 'comments.json'
 PLAYLISTS_FILE = 'playlists.json'
@@ -60,38 +128,111 @@ def load_json_file(filename, default=None):
     """Load JSON file with default value"""
     try:
         if os.path.exists(filename):
-            with open(filename, 'r') as f:
-                return json.load(f)
+            with open(filename, 'rb') as f:
+                data = f.read()
+            return orjson.loads(data) if orjson is not None else json.loads(data)
     except Exception as e:
         logger.error(f"Error loading {filename}: {e}")
     return default if default is not None else {}
 
 def save_json_file(filename, data):
-    """Save data to JSON file"""
+    """Write data as JSON atomically (temp file + rename)
+
+    No fsync — the stores hold nothing worth a forced disk flush, and
+    os.replace guarantees readers always see a complete file.
+    """
     try:
-        with open(filename, 'w') as f:
-            json.dump(data, f, indent=2)
+        tmp = filename + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(serialize_json(data))
+        os.replace(tmp, filename)
     except Exception as e:
         logger.error(f"Error saving {filename}: {e}")
 
+def json_response(obj) -> Response:
+    """Serialize an API payload with orjson when available"""
+    if orjson is not None:
+        return Response(orjson.dumps(obj), mimetype='application/json')
+    return jsonify(obj)
+
+def serialize_json(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+class JsonStore:
+    """In-memory JSON-backed store with coalesced background flushes
+
+    Posting a comment, playing a video or touching a playlist used to
+    re-read, re-parse, re-serialize and rewrite the whole JSON file inside
+    the request, with no locking between threads. The store loads the file
+    once, mutates in memory under a lock, and a daemon writer flushes dirty
+    snapshots atomically (temp file + os.replace) at most twice a second.
+    Reads hand back deep copies, so callers never share mutable state with
+    a concurrent writer; an atexit hook flushes whatever is still coalescing
+    when the process exits cleanly.
+    """
+    FLUSH_INTERVAL = 0.5
+
+    def __init__(self, filename: str):
+        self.filename = filename
+        self.lock = threading.Lock()
+        self.dirty = threading.Event()
+        self.data = load_json_file(filename, {})
+        writer = threading.Thread(target=self._flush_loop, daemon=True)
+        writer.start()
+        atexit.register(self._flush_pending)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            return copy.deepcopy(self.data)
+
+    def get(self, key, default=None):
+        with self.lock:
+            return copy.deepcopy(self.data.get(key, default))
+
+    def set(self, key, value):
+        with self.lock:
+            self.data[key] = value
+        self.dirty.set()
+
+    def append(self, key, value):
+        with self.lock:
+            self.data.setdefault(key, []).append(value)
+        self.dirty.set()
+
+    def update(self, mutate):
+        """Run mutate(data) under the lock for compound changes"""
+        with self.lock:
+            result = mutate(self.data)
+        self.dirty.set()
+        return result
+
+    def _flush_loop(self):
+        while True:
+            self.dirty.wait()
+            time.sleep(self.FLUSH_INTERVAL)  # coalesce bursts into one write
+            self.dirty.clear()
+            self.flush()
+
+    def flush(self):
+        save_json_file(self.filename, self.snapshot())
+
+    def _flush_pending(self):
+        # The writer is a daemon thread, so mutations made within the last
+        # FLUSH_INTERVAL would die with the process without this exit hook
+        if self.dirty.is_set():
+            self.dirty.clear()
+            self.flush()
+
 def load_duration_cache():
     """Load video duration cache from file"""
     global DURATION_CACHE
-    try:
-        if os.path.exists(Config.DURATION_CACHE_FILE):
-            with open(Config.DURATION_CACHE_FILE, 'r') as f:
-                DURATION_CACHE = json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading duration cache: {e}")
-        DURATION_CACHE = {}
+    DURATION_CACHE = load_json_file(Config.DURATION_CACHE_FILE, {})
 
 def save_duration_cache():
     """Save video duration cache to file"""
-    try:
-        with open(Config.DURATION_CACHE_FILE, 'w') as f:
-            json.dump(DURATION_CACHE, f)
-    except Exception as e:
-        logger.error(f"Error saving duration cache: {e}")
+    save_json_file(Config.DURATION_CACHE_FILE, DURATION_CACHE)
 
 def get_video_duration(video_path: Path) -> str:
     """Get video duration using ffmpeg"""
@@ -118,150 +259,506 @@ def get_video_duration(video_path: Path) -> str:
         return "Unknown"
 
 class PlaylistManager:
-    def __init__(self):
-        self.playlists = defaultdict(list)
-        self.load_playlists()
-
-    def load_playlists(self):
-        """Load playlists from file"""
-        try:
-            if os.path.exists(PLAYLISTS_FILE):
-                with open(PLAYLISTS_FILE, 'r') as f:
-                    self.playlists = defaultdict(list, json.load(f))
-        except Exception as e:
-            logger.error(f"Error loading playlists: {e}")
-
-    def save_playlists(self):
-        """Save playlists to file"""
-        try:
-            with open(PLAYLISTS_FILE, 'w') as f:
-                json.dump(dict(self.playlists), f)
-        except Exception as e:
-            logger.error(f"Error saving playlists: {e}")
+    def __init__(self, store: JsonStore):
+        self.store = store
 
     def create_playlist(self, name: str) -> bool:
         """Create a new playlist"""
-        if name not in self.playlists:
-            self.playlists[name] = []
-            self.save_playlists()
+        def create(playlists):
+            if name in playlists:
+                return False
+            playlists[name] = []
             return True
-        return False
+        return self.store.update(create)
 
     def add_to_playlist(self, name: str, video: str) -> bool:
         """Add video to playlist"""
-        if video not in self.playlists[name]:
-            self.playlists[name].append(video)
-            self.save_playlists()
+        def add(playlists):
+            videos = playlists.setdefault(name, [])
+            if video in videos:
+                return False
+            videos.append(video)
             return True
-        return False
+        return self.store.update(add)
 
     def remove_from_playlist(self, name: str, video: str) -> bool:
         """Remove video from playlist"""
-        if video in self.playlists[name]:
-            self.playlists[name].remove(video)
-            self.save_playlists()
+        def remove(playlists):
+            if video not in playlists.get(name, []):
+                return False
+            playlists[name].remove(video)
             return True
-        return False
+        return self.store.update(remove)
 
     def get_playlist(self, name: str) -> list:
         """Get playlist contents"""
-        return self.playlists[name]
+        return self.store.get(name, [])
 
     def get_all_playlists(self) -> dict:
         """Get all playlists"""
-        return dict(self.playlists)
+        return self.store.snapshot()
 
     def delete_playlist(self, name: str) -> bool:
         """Delete playlist"""
-        if name in self.playlists:
-            del self.playlists[name]
-            self.save_playlists()
+        def delete(playlists):
+            if name not in playlists:
+                return False
+            del playlists[name]
             return True
-        return False
-
-playlist_manager = PlaylistManager()
-
-def get_video_info(path: Path):
-    """Get enhanced video file information"""
-    stat = os.stat(path)
+        return self.store.update(delete)
+
+comments_store = JsonStore(COMMENTS_FILE)
+history_store = JsonStore(WATCH_HISTORY_FILE)
+playlists_store = JsonStore(PLAYLISTS_FILE)
+playlist_manager = PlaylistManager(playlists_store)
+
+# get_video_info results keyed by path, invalidated when the file's mtime
+# changes; repeat listings and watch/stream hits skip the stat-derived work
+_INFO_CACHE = {}
+_info_cache_lock = threading.Lock()
+
+def get_video_info(path: Path, stat=None):
+    """Get enhanced video file information
+
+    The returned dict is the cached instance, shared with the directory
+    snapshot and listing payloads — treat it as immutable and copy before
+    adding request-specific keys.
+    """
+    if stat is None:
+        stat = fast_stat(path)
+    key = str(path)
+    with _info_cache_lock:
+        cached = _INFO_CACHE.get(key)
+        if cached is not None and cached[0] == stat.st_mtime:
+            return cached[1]
+    info = _build_video_info(path, stat)
+    with _info_cache_lock:
+        _INFO_CACHE[key] = (stat.st_mtime, info)
+    return info
+
+def _build_video_info(path: Path, stat):
     return {
         'name': path.name,
         'size': stat.st_size,
         'size_formatted': format_size(stat.st_size),
         'modified': stat.st_mtime,
         'modified_formatted': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-        'mime_type': mimetypes.guess_type(path.name)[0] or 'video/mp4',
+        'mime_type': _EXT_MIME.get(path.suffix.lower(), 'video/mp4'),
         'duration': get_video_duration(path),
         'thumbnail': f"/static/images/{html.escape(path.stem)}.jpg"
     }
 
-def partial_response(file: BinaryIO, start: int, end: int, total: int, chunk_size: int, mime_type: str):
-    """Generate partial response for range requests"""
-    def generate():
-        remaining = end - start + 1
-        file.seek(start)
-        while remaining:
-            chunk = min(chunk_size, remaining)
-            data = file.read(chunk)
-            if not data:
+# Constant response headers, built once instead of per request
+_CACHE_CONTROL = f'public, max-age={Config.MAX_CACHE_AGE}'
+_BASE_HEADERS = (('Accept-Ranges', 'bytes'), ('Cache-Control', _CACHE_CONTROL))
+
+# Positions of the validator pairs in the video_response_headers tuple,
+# used by the conditional-request short-circuit in stream_video
+_ETAG_IDX = 1
+_LAST_MODIFIED_IDX = 2
+
+@functools.lru_cache(maxsize=256)
+def video_response_headers(path: str, mtime: float, size: int) -> tuple:
+    """Constant response headers for a video, rebuilt only when the file changes"""
+    dot = path.rfind('.')
+    return (
+        ('Content-Type', _EXT_MIME.get(path[dot:].lower(), 'video/mp4')),
+        ('ETag', f'W/"{int(mtime)}-{size:x}"'),
+        ('Last-Modified', formatdate(mtime, usegmt=True)),
+        *_BASE_HEADERS,
+    )
+
+# Drop page-cache pages this far behind the stream position (one-time
+# sequential reads would otherwise evict more useful cached data)
+FADVISE_DROP_WINDOW = 16 * 1024 * 1024
+
+_HAS_FADVISE = hasattr(os, 'posix_fadvise')
+
+def advise_readahead(fd: int, start: int, length: int):
+    """Hint the kernel to prefetch the byte range we are about to stream"""
+    if _HAS_FADVISE:
+        os.posix_fadvise(fd, start, length, os.POSIX_FADV_SEQUENTIAL)
+        os.posix_fadvise(fd, start, length, os.POSIX_FADV_WILLNEED)
+
+def advise_done(fd: int, start: int, length: int):
+    """Tell the kernel the streamed-out byte range will not be re-read"""
+    if _HAS_FADVISE:
+        os.posix_fadvise(fd, start, length, os.POSIX_FADV_DONTNEED)
+
+class VideoFdPool:
+    """Keep popular video files open and reopen them through /proc/self/fd
+
+    Opening /proc/self/fd/<n> resolves straight to the pooled fd's inode,
+    skipping the walk and permission checks of the video's real path while
+    still producing an independent open file description — unlike dup(2),
+    whose duplicates share one file offset and would let concurrent streams
+    clobber each other's seeks. Entries are keyed by (path, mtime) so a
+    replaced file gets a new fd, with LRU eviction beyond capacity.
+    """
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.fds = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _reopen(self, fd: int, path) -> BinaryIO:
+        try:
+            return os.fdopen(os.open(f'/proc/self/fd/{fd}', os.O_RDONLY), 'rb')
+        except OSError:
+            # No procfs (non-Linux): fall back to the real path
+            return open(path, 'rb')
+
+    def open(self, path, mtime) -> BinaryIO:
+        key = (str(path), mtime)
+        with self.lock:
+            fd = self.fds.get(key)
+            if fd is not None:
+                self.fds.move_to_end(key)
+                return self._reopen(fd, path)
+        fd = os.open(path, os.O_RDONLY)
+        evicted = []
+        with self.lock:
+            old = self.fds.pop(key, None)
+            if old is not None:
+                evicted.append(old)
+            self.fds[key] = fd
+            handle = self._reopen(fd, path)
+            while len(self.fds) > self.capacity:
+                _, stale = self.fds.popitem(last=False)
+                evicted.append(stale)
+        for stale in evicted:
+            os.close(stale)
+        return handle
+
+video_fd_pool = VideoFdPool()
+
+# Shared pool for the per-response readahead threads, bounded so a burst of
+# concurrent viewers cannot spawn an unbounded number of reader threads
+_PREFETCH_POOL = ThreadPoolExecutor(max_workers=2 * (os.cpu_count() or 2))
+
+# Recycled chunk buffers shared by all fallback streams; readinto on a pooled
+# buffer avoids allocating and freeing a fresh CHUNK_SIZE bytes object per
+# chunk. Buffers are anonymous mmaps, so they sit page-aligned outside the
+# allocator's arenas and the kernel can fill them without split-page copies.
+# The pool fills lazily up to its cap and extra buffers are dropped.
+_BUF_POOL = queue.LifoQueue(maxsize=64)
+
+def _get_buffer() -> mmap.mmap:
+    try:
+        return _BUF_POOL.get_nowait()
+    except queue.Empty:
+        return mmap.mmap(-1, Config.CHUNK_SIZE)
+
+def _put_buffer(buf: mmap.mmap):
+    try:
+        _BUF_POOL.put_nowait(buf)
+    except queue.Full:
+        buf.close()
+
+def stream_chunks(file: BinaryIO, start: int, length: int, chunk_size: int):
+    """Yield file chunks while a background reader keeps the disk ahead of the socket
+
+    Video clients burst, stall and seek; reading synchronously between socket
+    sends leaves the disk idle whenever the socket blocks (and vice versa).
+    A small queue of pre-read chunks keeps both sides busy.
+    """
+    fd = file.fileno()
+    advise_readahead(fd, start, length)
+    chunks = queue.Queue(maxsize=Config.READAHEAD_DEPTH)
+    stop = threading.Event()
+
+    def deliver(data) -> bool:
+        while not stop.is_set():
+            try:
+                chunks.put(data, timeout=1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def read_ahead():
+        offset = drop_mark = start
+        try:
+            file.seek(start)
+            remaining = length
+            while remaining and not stop.is_set():
+                buf = _get_buffer()
+                want = min(chunk_size, remaining, len(buf))
+                read = file.readinto(memoryview(buf)[:want])
+                if not read:
+                    _put_buffer(buf)
+                    break
+                remaining -= read
+                if not deliver((buf, read)):
+                    _put_buffer(buf)
+                    return
+                offset += read
+                # Pages already copied into a pooled buffer are done with
+                # the page cache, so drop-behind tracks the read position
+                if offset - drop_mark >= FADVISE_DROP_WINDOW:
+                    advise_done(fd, drop_mark, offset - drop_mark)
+                    drop_mark = offset
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading video chunks: {e}")
+        finally:
+            deliver(None)
+            # With the fadvise hints issued above, the reader really is the
+            # last thread to touch the fd; the consumer only sees buffers
+            file.close()
+
+    _PREFETCH_POOL.submit(read_ahead)
+    try:
+        while True:
+            item = chunks.get()
+            if item is None:
                 break
-            remaining -= len(data)
-            yield data
+            buf, read = item
+            view = memoryview(buf)[:read]
+            yield view
+            # Once the generator resumes the chunk has been written out,
+            # so the buffer can go back into rotation
+            view.release()
+            _put_buffer(buf)
+    finally:
+        stop.set()
+        while True:
+            try:
+                item = chunks.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                _put_buffer(item[0])
+
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+
+def parse_range(range_header: str, total_size: int):
+    """Parse a single-range Range header into (start, end), or None if unsatisfiable
+
+    Handles suffix ranges (bytes=-500) and clamps open-ended ranges, instead
+    of 500ing on anything but the simple start-end form.
+    """
+    match = _RANGE_RE.match(range_header)
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start:
+        if not end or int(end) == 0:
+            return None
+        return max(0, total_size - int(end)), total_size - 1
+    start = int(start)
+    end = min(int(end), total_size - 1) if end else total_size - 1
+    if start > end or start >= total_size:
+        return None
+    return start, end
+
+class RangedFile:
+    """File-like view of a byte range so wsgi.file_wrapper can serve 206 responses
+
+    Sendfile-aware servers use fileno() and the Content-Length cap to push the
+    range kernel-side; plain servers fall back to the capped read() loop.
+    """
+    def __init__(self, file: BinaryIO, start: int, length: int):
+        self.file = file
+        self.remaining = length
+        file.seek(start)
 
+    def read(self, size: int = -1) -> bytes:
+        if self.remaining <= 0:
+            return b''
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def tell(self) -> int:
+        return self.file.tell()
+
+    def fileno(self) -> int:
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+def mmap_chunks(mm: mmap.mmap, start: int, length: int, chunk_size: int):
+    """Yield memoryview slices of a mapped file — no per-chunk allocation
+
+    The kernel reads ahead on the mapping and the slices go straight to the
+    socket, so streaming allocates O(1) Python objects instead of one fresh
+    bytes object per chunk.
+    """
+    if hasattr(mm, 'madvise'):
+        mm.madvise(mmap.MADV_SEQUENTIAL)
+    view = memoryview(mm)
+    end = start + length
+    drop_mark = start - (start % mmap.PAGESIZE) + mmap.PAGESIZE
+    try:
+        for offset in range(start, end, chunk_size):
+            yield view[offset:min(offset + chunk_size, end)]
+            boundary = offset + chunk_size
+            boundary -= boundary % mmap.PAGESIZE
+            if boundary - drop_mark >= FADVISE_DROP_WINDOW and hasattr(mm, 'madvise'):
+                mm.madvise(mmap.MADV_DONTNEED, drop_mark, boundary - drop_mark)
+                drop_mark = boundary
+    finally:
+        try:
+            view.release()
+            mm.close()
+        except BufferError:
+            # A yielded slice is still referenced; GC reclaims the map later
+            pass
+
+def response_body(file: BinaryIO, start: int, length: int, chunk_size: int):
+    """Pick the cheapest transport for the byte range
+
+    When the WSGI server provides a file_wrapper, hand it the (ranged) file
+    object so sendfile-capable servers move bytes kernel-side with no
+    userspace copy. Otherwise map the file and yield memoryview slices; the
+    readahead generator remains as the last-resort fallback.
+    """
+    wrapper = request.environ.get('wsgi.file_wrapper')
+    if wrapper is not None:
+        advise_readahead(file.fileno(), start, length)
+        return wrapper(RangedFile(file, start, length), chunk_size)
+    if length:
+        try:
+            mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError) as e:
+            logger.error(f"Falling back to chunked reads, mmap failed: {e}")
+        else:
+            # mmap dups the descriptor, so the file object can go now and the
+            # mapping (closed by mmap_chunks) keeps the data reachable
+            file.close()
+            return mmap_chunks(mm, start, length, chunk_size)
+    return stream_chunks(file, start, length, chunk_size)
+
+def effective_chunk_size(length: int) -> int:
+    """Pick a streaming chunk size for a transfer of the given length
+
+    Long sequential transfers use BUFFER_SIZE chunks so fewer read calls and
+    generator hops move the same bytes; short ranges stick with CHUNK_SIZE.
+    Either way the size is capped at the client socket's send buffer —
+    chunks larger than SO_SNDBUF park the worker in one long blocking write
+    to a slow client, and matching the kernel buffer keeps writes short.
+    """
+    size = Config.BUFFER_SIZE if length >= Config.BUFFER_SIZE else Config.CHUNK_SIZE
+    sock = request.environ.get('werkzeug.socket')
+    if sock is not None:
+        try:
+            sndbuf = sock.getsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF)
+            if 0 < sndbuf < size:
+                return sndbuf
+        except OSError:
+            pass
+    return size
+
+def partial_response(file: BinaryIO, start: int, end: int, total: int, chunk_size: int, headers: tuple):
+    """Generate partial response for range requests"""
     return Response(
-        generate(),
+        response_body(file, start, end - start + 1, chunk_size),
         206,
-        {
-            'Content-Type': mime_type,
-            'Accept-Ranges': 'bytes',
-            'Content-Range': f'bytes {start}-{end}/{total}',
-            'Content-Length': end - start + 1,
-            'Cache-Control': f'public, max-age={Config.MAX_CACHE_AGE}'
-        },
+        [
+            *headers,
+            ('Content-Range', f'bytes {start}-{end}/{total}'),
+            ('Content-Length', str(end - start + 1)),
+        ],
         direct_passthrough=True
     )
 
-def full_response(file: BinaryIO, total: int, chunk_size: int, mime_type: str):
+def full_response(file: BinaryIO, total: int, chunk_size: int, headers: tuple):
     """Generate full file response"""
-    def generate():
-        remaining = total
-        while remaining:
-            chunk = min(chunk_size, remaining)
-            data = file.read(chunk)
-            if not data:
-                break
-            remaining -= len(data)
-            yield data
-
     return Response(
-        generate(),
+        response_body(file, 0, total, chunk_size),
         200,
-        {
-            'Content-Type': mime_type,
-            'Accept-Ranges': 'bytes',
-            'Content-Length': total,
-            'Cache-Control': f'public, max-age={Config.MAX_CACHE_AGE}'
-        },
+        [
+            *headers,
+            ('Content-Length', str(total)),
+        ],
         direct_passthrough=True
     )
 
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB', 'PB')
+
 def format_size(size: int) -> str:
     """Format file size in human readable format"""
-    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-        if size < 1024:
-            return f"{size:.1f} {unit}"
-        size /= 1024
-    return f"{size:.1f} PB"
+    if size < 1024:
+        return f"{size} B"
+    unit = min((size.bit_length() - 1) // 10, len(_SIZE_UNITS) - 1)
+    return f"{size / (1 << (10 * unit)):.1f} {_SIZE_UNITS[unit]}"
 
 @app.route('/')
 def index():
-    """Render the home page"""
-    return render_template_string(HOME_PAGE_TEMPLATE)
+    """Serve the home page (fully static, pre-rendered and pre-compressed)"""
+    if _HOME_ETAG in request.headers.get('If-None-Match', ''):
+        return Response('', 304, [('ETag', _HOME_ETAG)])
+    headers = [('ETag', _HOME_ETAG), ('Cache-Control', 'public, max-age=300')]
+    accept_encoding = request.headers.get('Accept-Encoding', '')
+    if _HOME_BR is not None and 'br' in accept_encoding:
+        body = _HOME_BR
+        headers += [('Content-Encoding', 'br'), ('Vary', 'Accept-Encoding')]
+    elif 'gzip' in accept_encoding:
+        body = _HOME_GZ
+        headers += [('Content-Encoding', 'gzip'), ('Vary', 'Accept-Encoding')]
+    else:
+        body = _HOME_BYTES
+    return Response(body, mimetype='text/html', headers=headers)
 
 @app.route('/api/history')
 def list_history():
-    history = load_json_file(WATCH_HISTORY_FILE, {})
-    return history
+    return history_store.snapshot()
+
+# Serialized /api/videos pages keyed by (directory mtime_ns, page); repeat
+# scroll hits become a dict lookup plus socket write
+_PAGE_CACHE = {}
+_page_cache_lock = threading.Lock()
+
+# Last history write per filename (monotonic seconds), to debounce the
+# flurry of range requests a single playback generates
+_LAST_HISTORY_UPDATE = {}
+_HISTORY_DEBOUNCE = 30
+
+@functools.lru_cache(maxsize=32)
+def _shuffled_indices(seed: str, count: int) -> tuple:
+    """Deterministic shuffled order for a (seed, library size) pair
+
+    Built once per seed with a private Random instance — no module-level RNG
+    lock and no per-request seeding — then every page of that shuffle is a
+    plain slice.
+    """
+    order = list(range(count))
+    random.Random(seed).shuffle(order)
+    return tuple(order)
+
+# Snapshot of the full directory listing, rebuilt only when the directory
+# mtime changes (adding or removing a video bumps it); per-file changes are
+# caught by the mtime check inside get_video_info
+_DIR_SNAPSHOT = {'mtime_ns': -1, 'videos': []}
+_dir_snapshot_lock = threading.Lock()
+
+def get_directory_videos() -> list:
+    """Return cached video info for the whole video directory"""
+    mtime_ns = os.stat(Config.VIDEO_DIR).st_mtime_ns
+    with _dir_snapshot_lock:
+        if _DIR_SNAPSHOT['mtime_ns'] == mtime_ns:
+            return _DIR_SNAPSHOT['videos']
+    video_dir = Path(Config.VIDEO_DIR)
+    videos = []
+    # The savings here are the mtime-gated snapshot above and the extension
+    # prefilter below, which skips the stat for non-video names entirely.
+    # (On Linux the directory read yields only names, so DirEntry.stat()
+    # still costs one stat per kept entry — same as the old glob path.)
+    with os.scandir(video_dir) as entries:
+        for entry in entries:
+            name = entry.name
+            dot = name.rfind('.')
+            if dot < 0 or name[dot:].lower() not in Config.ALLOWED_EXTENSIONS:
+                continue
+            videos.append(get_video_info(video_dir / name, stat=entry.stat()))
+    # Sort once at build time; per-request work is then filter + slice
+    videos.sort(key=lambda x: x['modified'], reverse=True)
+    with _dir_snapshot_lock:
+        _DIR_SNAPSHOT['mtime_ns'] = mtime_ns
+        _DIR_SNAPSHOT['videos'] = videos
+    return videos
 
 @app.route('/api/videos')
 def list_videos():
@@ -271,43 +768,68 @@ def list_videos():
         search = request.args.get('search', '').lower()
         playlist = request.args.get('playlist')
         shuffle = request.args.get('shuf')
-        
-        videos = []
+
+        # Plain paged listings repeat on every scroll; serve them from the
+        # serialized cache as long as the directory is unchanged
+        cacheable = not (search or playlist or shuffle)
+        if cacheable:
+            cache_key = (os.stat(Config.VIDEO_DIR).st_mtime_ns, page)
+            with _page_cache_lock:
+                body = _PAGE_CACHE.get(cache_key)
+            if body is not None:
+                return Response(body, mimetype='application/json')
+
         video_dir = Path(Config.VIDEO_DIR)
-        
+
         # Get videos from playlist if specified
         if playlist:
+            videos = []
             playlist_videos = playlist_manager.get_playlist(playlist)
-            video_files = [video_dir / html.unescape(unquote(name)) for name in playlist_videos]
-            print(video_files)
+            for name in playlist_videos:
+                file = video_dir / html.unescape(unquote(name))
+                if file.suffix.lower() in Config.ALLOWED_EXTENSIONS:
+                    if search and search not in file.name.lower():
+                        continue
+                    videos.append(get_video_info(file))
         else:
-            video_files = video_dir.glob('*')
-        
-        for file in video_files:
-            if file.suffix.lower() in Config.ALLOWED_EXTENSIONS:
-                if search and search not in file.name.lower():
-                    continue
-                    
-                video_info = get_video_info(file)
-                videos.append(video_info)
+            videos = get_directory_videos()
+            if search:
+                videos = [v for v in videos if search in v['name'].lower()]
+            else:
+                videos = list(videos)
 
-        # Sort videos by modified date
-        if shuffle:
-            import random
-            random.shuffle(videos)
-        else:
-            videos.sort(key=lambda x: x['modified'], reverse=True)
-        
         # Implement pagination
         start_idx = (page - 1) * Config.ITEMS_PER_PAGE
         end_idx = start_idx + Config.ITEMS_PER_PAGE
-        paginated_videos = videos[start_idx:end_idx]
-        
-        return jsonify({
+
+        if shuffle:
+            # Slice a memoized deterministic order, so pages stay consistent
+            # with each other and repeat pages do no RNG work at all
+            seed = request.args.get('seed', '') or str(_DIR_SNAPSHOT['mtime_ns'])
+            indices = _shuffled_indices(seed, len(videos))[start_idx:end_idx]
+            paginated_videos = [videos[i] for i in indices]
+        else:
+            # Directory listings arrive pre-sorted from the snapshot; only
+            # playlist subsets still need the sort
+            if playlist:
+                videos.sort(key=lambda x: x['modified'], reverse=True)
+            paginated_videos = videos[start_idx:end_idx]
+
+        payload = {
             'videos': paginated_videos,
             'total': len(videos),
-            'pages': (len(videos) + Config.ITEMS_PER_PAGE - 1) // Config.ITEMS_PER_PAGE
-        })
+            'pages': (len(videos) + Config.ITEMS_PER_PAGE - 1) // Config.ITEMS_PER_PAGE,
+            'has_more': end_idx < len(videos)
+        }
+        if cacheable:
+            body = serialize_json(payload)
+            with _page_cache_lock:
+                # Directory changed: all cached pages are stale
+                if _PAGE_CACHE and next(iter(_PAGE_CACHE))[0] != cache_key[0]:
+                    _PAGE_CACHE.clear()
+                _PAGE_CACHE[cache_key] = body
+            return Response(body, mimetype='application/json')
+        return json_response(payload)
     except Exception as e:
         logger.exception(f"Error listing videos: {e}")
         return {'error': str(e)}, 500
@@ -328,11 +850,9 @@ def handle_playlists():
             
         if video:
             success = playlist_manager.add_to_playlist(name, video)
-            playlist_manager.load_playlists()
             return {'success': success, 'message': 'Video added to playlist'}
         else:
             success = playlist_manager.create_playlist(name)
-            playlist_manager.load_playlists()
             return {'success': success, 'message': 'Playlist created'}
     
     elif request.method == 'DELETE':
@@ -371,12 +891,11 @@ def watch_video(filename):
     try:
         filename = html.unescape(unquote(filename))
         video_path = Path(Config.VIDEO_DIR) / filename
-        if not video_path.exists():
-            return {'error': 'Video not found'}, 404
-
-        video_info = get_video_info(video_path)
+        # Copy before annotating: the cached dict is shared with the
+        # directory snapshot, and next_video must not leak into listings
+        video_info = dict(get_video_info(video_path))
         playlist_name = request.args.get('playlist')
-        
+
         if playlist_name:
             playlist = playlist_manager.get_playlist(playlist_name)
             try:
@@ -387,7 +906,22 @@ def watch_video(filename):
             except ValueError:
                 pass
 
-        return render_template_string(VIDEO_PLAYER_TEMPLATE, video_info=video_info, playlist_name=playlist_name)
+        # Playlist views vary with playlist state, so only plain player
+        # pages get the revalidation shortcut
+        if not playlist_name:
+            cache_key = f"{video_info['name']}:{video_info['modified']}"
+            etag = f'"{hashlib.md5(cache_key.encode()).hexdigest()}"'
+            if etag in request.headers.get('If-None-Match', ''):
+                return Response('', 304, [('ETag', etag)])
+            return Response(
+                _PLAYER_TEMPLATE.render(video_info=video_info, playlist_name=None),
+                mimetype='text/html',
+                headers=[('ETag', etag), ('Cache-Control', 'private, max-age=300')]
+            )
+
+        return _PLAYER_TEMPLATE.render(video_info=video_info, playlist_name=playlist_name)
+    except FileNotFoundError:
+        return {'error': 'Video not found'}, 404
     except Exception as e:
         logger.error(f"Error loading video player for {filename}: {e}")
         return {'error': str(e)}, 500
@@ -397,29 +931,67 @@ def stream_video(filename):
     """Stream video with support for range requests"""
     try:
         video_path = Path(Config.VIDEO_DIR) / filename
-        if not video_path.exists():
-            return {'error': 'Video not found'}, 404
-
-        # Update watch history
-        history = load_json_file(WATCH_HISTORY_FILE, {})
-        history[filename] = datetime.now().isoformat()
-        save_json_file(WATCH_HISTORY_FILE, history)
-
-        video_info = get_video_info(video_path)
-        total_size = video_info['size']
-        mime_type = video_info['mime_type']
 
-        file = open(video_path, 'rb')
+        # One stat is all the transfer needs — size and mtime. The full
+        # get_video_info dict (formatted size, timestamps) is player-page
+        # material; building it per range request is pure churn.
+        # fast_stat raises FileNotFoundError for missing files, handled below
+        st = fast_stat(video_path)
         range_header = request.headers.get('Range')
-        
-        if range_header:
-            byte_start, byte_end = range_header.replace('bytes=', '').split('-')
-            byte_start = int(byte_start)
-            byte_end = min(int(byte_end) if byte_end else total_size - 1, total_size - 1)
-            return partial_response(file, byte_start, byte_end, total_size, Config.CHUNK_SIZE, mime_type)
-
-        return full_response(file, total_size, Config.CHUNK_SIZE, mime_type)
 
+        # Update watch history (epoch ms; the JS feeds it straight to Date)
+        # only when playback starts, not for every seek or buffer refill
+        if not range_header or range_header.startswith('bytes=0-'):
+            now = time.monotonic()
+            if now - _LAST_HISTORY_UPDATE.get(filename, 0) > _HISTORY_DEBOUNCE:
+                _LAST_HISTORY_UPDATE[filename] = now
+                history_store.set(filename, time.time_ns() // 1_000_000)
+
+        total_size = st.st_size
+        headers = video_response_headers(str(video_path), st.st_mtime, total_size)
+
+        # Revalidation hit: answer from the cached validators without ever
+        # opening the file
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            if headers[_ETAG_IDX][1] in if_none_match:
+                return Response('', 304, headers)
+        elif request.headers.get('If-Modified-Since') == headers[_LAST_MODIFIED_IDX][1]:
+            return Response('', 304, headers)
+
+        if Config.USE_X_ACCEL:
+            # nginx honors Range natively once it takes over the transfer
+            return Response('', 200, [
+                *headers,
+                ('X-Accel-Redirect', f'{Config.X_ACCEL_PREFIX}/{quote(filename)}'),
+            ])
+
+        file = video_fd_pool.open(video_path, st.st_mtime)
+        try:
+            if _HAS_FADVISE:
+                # Whole-file sequential hint widens the kernel readahead
+                # window for this description; the per-range WILLNEED/
+                # DONTNEED hints are issued by the transport helpers
+                os.posix_fadvise(file.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+
+            if range_header:
+                byte_range = parse_range(range_header, total_size)
+                if byte_range is None:
+                    file.close()
+                    return Response('', 416, [('Content-Range', f'bytes */{total_size}')])
+                byte_start, byte_end = byte_range
+                chunk_size = effective_chunk_size(byte_end - byte_start + 1)
+                return partial_response(file, byte_start, byte_end, total_size, chunk_size, headers)
+
+            return full_response(file, total_size, effective_chunk_size(total_size), headers)
+        except Exception:
+            # Once a response owns the file its transport closes it; anything
+            # that raises before then must not leak the descriptor
+            file.close()
+            raise
+
+    except FileNotFoundError:
+        return {'error': 'Video not found'}, 404
     except Exception as e:
         logger.error(f"Error streaming video {filename}: {e}")
         return {'error': str(e)}, 500
@@ -650,10 +1222,13 @@ HOME_PAGE_TEMPLATE = '''
         let currentPage = 1;
         let totalPages = 1;
         let currentPlaylist = '';
+        let currentShuffle = '';
+        let currentShuffleSeed = '';
 
         async function loadVideos(page = 1, search = '', playlist = '', shuffle='') {
             try {
-                const response = await fetch(`/api/videos?page=${page}&shuf=${shuffle}&search=${search}&playlist=${playlist}`);
+                const seed = shuffle ? currentShuffleSeed : '';
+                const response = await fetch(`/api/videos?page=${page}&shuf=${shuffle}&seed=${seed}&search=${search}&playlist=${playlist}`);
                 const data = await response.json();
                 
                 const videosContainer = document.getElementById('videos');
@@ -697,7 +1272,7 @@ HOME_PAGE_TEMPLATE = '''
                 button.textContent = i;
                 button.onclick = () => {
                     currentPage = i;
-                    loadVideos(i, document.getElementById('search').value, currentPlaylist);
+                    loadVideos(i, document.getElementById('search').value, currentPlaylist, currentShuffle);
                 };
                 pagination.appendChild(button);
             }
@@ -742,12 +1317,14 @@ HOME_PAGE_TEMPLATE = '''
         // Event Listeners
         document.getElementById('search').addEventListener('input', debounce(e => {
             currentPage = 1;
+            currentShuffle = '';
             loadVideos(1, e.target.value, currentPlaylist);
         }, 300));
 
         document.getElementById('playlist-select').addEventListener('change', e => {
             currentPlaylist = e.target.value;
             currentPage = 1;
+            currentShuffle = '';
             loadVideos(1, document.getElementById('search').value, currentPlaylist);
         });
 
@@ -773,7 +1350,12 @@ HOME_PAGE_TEMPLATE = '''
         }
 
         function shuffleVideos() {
-            loadVideos(1, '', '', shuffle="test");
+            // Fresh seed per press; pages of one shuffled session reuse it
+            // so the server-side order stays stable while paginating
+            currentShuffle = '1';
+            currentShuffleSeed = Date.now().toString();
+            currentPage = 1;
+            loadVideos(1, '', '', currentShuffle);
         }
 
         // Show watch history modal
@@ -1057,25 +1639,45 @@ async function createPlaylist() {
 </body></html>
 '''
 
+# Compile the embedded templates once at import; render_template_string
+# re-hashes the whole source string on every request just to hit Jinja's
+# cache. The home page has no dynamic data at all, so render it once too.
+_PLAYER_TEMPLATE = app.jinja_env.from_string(VIDEO_PLAYER_TEMPLATE)
+_HOME_RENDERED = app.jinja_env.from_string(HOME_PAGE_TEMPLATE).render()
+
+def _minify_html(text: str) -> str:
+    """Strip indentation and blank lines from inline HTML/CSS/JS
+
+    Deliberately conservative — newlines are kept so line comments and
+    statement boundaries in the inline JS survive — but indentation is the
+    bulk of the template's dead weight anyway.
+    """
+    lines = (line.strip() for line in text.splitlines())
+    return '\n'.join(line for line in lines if line)
+
+# Minify and compress the static home page once at import; per request we
+# only pick the best representation the client accepts
+_HOME_BYTES = _minify_html(_HOME_RENDERED).encode('utf-8')
+_HOME_GZ = gzip.compress(_HOME_BYTES, compresslevel=9)
+_HOME_BR = brotli.compress(_HOME_BYTES, quality=11) if brotli is not None else None
+_HOME_ETAG = f'"{hashlib.md5(_HOME_BYTES).hexdigest()}"'
+
 @app.route('/api/comments/<filename>', methods=['GET', 'POST'])
 def handle_comments(filename):
     """Handle video comments"""
-    comments = load_json_file(COMMENTS_FILE, {})
-    if filename not in comments:
-        comments[filename] = []
-    
     if request.method == 'POST':
         comment_data = request.json
         comment = {
             'text': comment_data['text'],
-            'timestamp': datetime.now().isoformat(),
+            # Epoch ms: cheaper than datetime.now().isoformat() and accepted
+            # as-is by the client's new Date(timestamp)
+            'timestamp': time.time_ns() // 1_000_000,
             'username': comment_data.get('username', 'Anonymous')
         }
-        comments[filename].append(comment)
-        save_json_file(COMMENTS_FILE, comments)
+        comments_store.append(filename, comment)
         return jsonify(comment)
-    
-    return jsonify(comments.get(filename, []))
+
+    return jsonify(comments_store.get(filename, []))
 
 if __name__ == '__main__':
     try:
@@ -1084,16 +1686,19 @@ if __name__ == '__main__':
         # Ensure required directories exist
         os.makedirs(Config.VIDEO_DIR, exist_ok=True)
 
-        # Initialize empty JSON files if they don't exist
-        for filename in [COMMENTS_FILE, PLAYLISTS_FILE, WATCH_HISTORY_FILE]:
-            if not os.path.exists(filename):
-                save_json_file(filename, {})
-
+        # The Werkzeug dev server serializes streams behind the GIL and its
+        # thread pool; keep it for local use and point production at gunicorn
+        debug = os.environ.get('FLASK_DEBUG', '').lower() in ('1', 'true')
+        if not debug:
+            logger.info(
+                'Dev server is for local use; in production run: '
+                'gunicorn -w $(nproc) -k gthread --threads 8 wsgi:application'
+            )
         app.run(
             host='0.0.0.0',
             port=5000,
             threaded=True,
-            debug=True
+            debug=debug
         )
     except Exception as e:
         logger.error(f"Server error: {e}")
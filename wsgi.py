@@ -0,0 +1,13 @@
+"""WSGI entry point for the web player.
+
+Serve production traffic through a real WSGI server instead of the Werkzeug
+dev server, e.g.:
+
+    gunicorn -w $(nproc) -k gthread --threads 8 --worker-tmp-dir /dev/shm wsgi:application
+
+gthread workers let blocking file reads overlap across requests, and
+gunicorn's sendfile-capable wsgi.file_wrapper activates the zero-copy
+streaming path in web.py.
+"""
+
+from web import app as application